@@ -1,6 +1,10 @@
 import os
 import io
+import re
+import queue
+import threading
 from pathlib import Path
+from typing import Iterator, Optional
 from dotenv import load_dotenv
 
 import numpy as np
@@ -25,31 +29,70 @@ if Groq is not None and GROQ_API_KEY:
         GROQ_CLIENT = None
 
 
-def get_llm_response(user_text: str) -> str:
+def _llm_messages(user_text: str):
     # Use a short system instruction for the LLM (do not inject the full SYSTEM_PROMPT.txt)
     # The SYSTEM_PROMPT.txt is reserved for identity and developer instructions only.
-    messages = [
+    return [
         {"role": "system", "content": "You are a concise, voice-first assistant that answers clearly and briefly."},
         {"role": "user", "content": user_text},
     ]
 
+
+def get_llm_response(user_text: str) -> str:
     if GROQ_CLIENT is None:
         return "[LLM unavailable - set GROQ_API_KEY and install Groq SDK]"
 
     completion = GROQ_CLIENT.chat.completions.create(
         model="openai/gpt-oss-120b",
-        messages=messages,
+        messages=_llm_messages(user_text),
         temperature=0.7,
     )
     return completion.choices[0].message.content
 
 
+def stream_llm_response(user_text: str) -> Iterator[str]:
+    """Yield the LLM answer as it is generated (content deltas).
+
+    Same prompt and model as `get_llm_response`, but with `stream=True` so
+    callers can start speaking before the full answer is available.
+    """
+    if GROQ_CLIENT is None:
+        yield "[LLM unavailable - set GROQ_API_KEY and install Groq SDK]"
+        return
+
+    completion = GROQ_CLIENT.chat.completions.create(
+        model="openai/gpt-oss-120b",
+        messages=_llm_messages(user_text),
+        temperature=0.7,
+        stream=True,
+    )
+    for chunk in completion:
+        if not chunk.choices:
+            continue
+        content = chunk.choices[0].delta.content
+        if content:
+            yield content
+
+
+_IDENTITY: Optional[str] = None
+# "who are you", "who r u", "who u", ...
+_IDENT_RE = re.compile(r"\bwho\s+(are|r|u)\b")
+
+
 def get_identity_statement() -> str:
     """Return a concise first-person identity statement derived from SYSTEM_PROMPT.txt.
 
     This reads the system prompt, finds a "You are ..." line, and converts it to
     a natural "I am ..." reply so the assistant doesn't echo instructions verbatim.
+    The result is cached after the first call.
     """
+    global _IDENTITY
+    if _IDENTITY is None:
+        _IDENTITY = _read_identity_statement()
+    return _IDENTITY
+
+
+def _read_identity_statement() -> str:
     sys_prompt_path = Path(__file__).resolve().parent / "SYSTEM_PROMPT.txt"
     default = "I am Voice AI — a voice-first assistant."
     if not sys_prompt_path.exists():
@@ -87,9 +130,28 @@ def speak(text: str):
     sd.wait()
 
 
+def _tts_worker(q: "queue.Queue[str]"):
+    # One long-lived playback thread: no per-turn thread spawn, and the
+    # audio backend stays initialised between turns. block=False only
+    # helps the convert() fallback, whose decoded audio keeps playing while
+    # the next response is fetched; streamed PCM is written to the device
+    # as it arrives, so that path returns when its audio has been queued.
+    while True:
+        text = q.get()
+        try:
+            tts_speak(text, block=False)
+        except Exception as e:
+            print(f"[TTS playback failed] {e}")
+        finally:
+            q.task_done()
+
+
 def main():
     print("🎙️ Voice AI Assistant Ready (type 'exit' to stop)\n")
 
+    tts_queue: "queue.Queue[str]" = queue.Queue()
+    threading.Thread(target=_tts_worker, args=(tts_queue,), daemon=True).start()
+
     while True:
         user_text = input("You: ")
 
@@ -99,7 +161,7 @@ def main():
 
         # If user asks about identity, return the system prompt identity directly
         lowers = user_text.strip().lower()
-        if "who are" in lowers or "who r" in lowers or "who are you" in lowers or "who u" in lowers:
+        if _IDENT_RE.search(lowers):
             # Use the helper which converts the system prompt into a natural first-person reply
             response_text = get_identity_statement()
         else:
@@ -107,20 +169,8 @@ def main():
             response_text = get_llm_response(user_text)
 
         print("Bot:", response_text)
-        # Use the robust TTS helper to play the response in background (full-duplex)
-        try:
-            import threading
-
-            def _play(text):
-                try:
-                    tts_speak(text)
-                except Exception as e:
-                    print(f"[TTS playback failed] {e}")
-
-            t = threading.Thread(target=_play, args=(response_text,), daemon=True)
-            t.start()
-        except Exception as e:
-            print(f"[TTS thread spawn failed] {e}")
+        # Hand the response to the persistent TTS worker (plays in background, full-duplex)
+        tts_queue.put(response_text)
 
 
 if __name__ == "__main__":
@@ -3,6 +3,12 @@
 Functions to shorten/simplify LLM responses for spoken output.
 """
 import re
+from typing import Iterable, Iterator
+
+_WS = re.compile(r"\s+")
+_SENT = re.compile(r'(?<=[.!?]) +')
+# sentence end inside a growing stream buffer: punctuation + whitespace, or newline
+_STREAM_SENT = re.compile(r'(?<=[.!?])\s+|\n+')
 
 
 def postprocess_for_voice(text: str, max_sentence_words: int = 18) -> str:
@@ -13,10 +19,10 @@ def postprocess_for_voice(text: str, max_sentence_words: int = 18) -> str:
     excessive whitespace and fixes spacing around punctuation.
     """
     # Normalize whitespace
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _WS.sub(" ", text).strip()
 
     # Split into sentences (very simple splitter)
-    parts = re.split(r'(?<=[.!?]) +', text)
+    parts = _SENT.split(text)
     out_parts = []
     for p in parts:
         words = p.split()
@@ -26,3 +32,26 @@ def postprocess_for_voice(text: str, max_sentence_words: int = 18) -> str:
         out_parts.append(p)
 
     return " ".join(out_parts)
+
+
+def iter_sentences(chunks: Iterable[str]) -> Iterator[str]:
+    """Regroup streamed text chunks (e.g. LLM deltas) into whole sentences.
+
+    A sentence is released as soon as its terminating punctuation is
+    followed by whitespace (or a newline arrives), so TTS can start on
+    the first sentence while the rest is still being generated. Any
+    trailing text is released when the stream ends.
+    """
+    buf = ""
+    for chunk in chunks:
+        buf += chunk
+        parts = _STREAM_SENT.split(buf)
+        # the last part may still be growing; keep it buffered
+        buf = parts.pop()
+        for p in parts:
+            p = p.strip()
+            if p:
+                yield p
+    buf = buf.strip()
+    if buf:
+        yield buf
@@ -0,0 +1,70 @@
+"""BM25 scoring as a sparse matrix-vector product.
+
+`SparseBM25` reproduces `rank_bm25.BM25Okapi` scores (same k1, b,
+epsilon and IDF floor) but precomputes the per-(doc, term) BM25 weights
+into a scipy sparse matrix at build time. A query is then a sparse
+column gather plus a matvec instead of a Python loop over every
+document for each query term. Requires numpy and scipy; callers fall
+back to `rank_bm25` when they are missing.
+"""
+from typing import Dict, List, Sequence
+
+try:
+    import numpy as np
+    from scipy import sparse
+except Exception:
+    np = None
+    sparse = None
+
+
+class SparseBM25:
+    def __init__(self, corpus: Sequence[Sequence[str]], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        if np is None or sparse is None:
+            raise ImportError("SparseBM25 requires numpy and scipy")
+        self.vocab: Dict[str, int] = {}
+        rows: List[int] = []
+        cols: List[int] = []
+        tfs: List[int] = []
+        doc_len = np.zeros(len(corpus), dtype=np.float64)
+        for d, doc in enumerate(corpus):
+            doc_len[d] = len(doc)
+            counts: Dict[int, int] = {}
+            for tok in doc:
+                t = self.vocab.setdefault(tok, len(self.vocab))
+                counts[t] = counts.get(t, 0) + 1
+            rows.extend([d] * len(counts))
+            cols.extend(counts.keys())
+            tfs.extend(counts.values())
+
+        n_docs = len(corpus)
+        rows_a = np.asarray(rows, dtype=np.int64)
+        cols_a = np.asarray(cols, dtype=np.int64)
+        tf = np.asarray(tfs, dtype=np.float64)
+
+        # IDF as in BM25Okapi: negative values are floored to epsilon * mean idf
+        df = np.bincount(cols_a, minlength=len(self.vocab)).astype(np.float64)
+        idf = np.log(n_docs - df + 0.5) - np.log(df + 0.5)
+        if idf.size:
+            idf[idf < 0] = epsilon * idf.mean()
+        self.idf = idf
+
+        avgdl = doc_len.sum() / n_docs if n_docs else 0.0
+        norm = k1 * (1 - b + b * doc_len / avgdl) if avgdl else np.full(n_docs, k1)
+        weights = tf * (k1 + 1) / (tf + norm[rows_a])
+        # CSC so a query's few term columns can be gathered cheaply
+        self.weights = sparse.csc_matrix(
+            (weights, (rows_a, cols_a)), shape=(n_docs, len(self.vocab))
+        )
+
+    def get_scores(self, query: Sequence[str]) -> "np.ndarray":
+        qcounts: Dict[int, int] = {}
+        for tok in query:
+            t = self.vocab.get(tok)
+            if t is not None:
+                qcounts[t] = qcounts.get(t, 0) + 1
+        if not qcounts:
+            return np.zeros(self.weights.shape[0], dtype=np.float64)
+        cols = np.fromiter(qcounts.keys(), dtype=np.int64, count=len(qcounts))
+        # repeated query terms count once per occurrence, as in BM25Okapi
+        qv = self.idf[cols] * np.fromiter(qcounts.values(), dtype=np.float64, count=len(qcounts))
+        return self.weights[:, cols] @ qv
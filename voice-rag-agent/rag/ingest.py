@@ -7,6 +7,15 @@ This script is defensive: it only runs if `sentence-transformers` and
 `faiss` are available. It reads text files from `data/` under the
 project root, splits into chunks, encodes with a SentenceTransformer,
 builds a FAISS index and saves the index and documents for retrieval.
+
+The index type is chosen with the `VRAG_INDEX` environment variable:
+`hnsw` (default, graph search with no training step), `hnswsq` (HNSW
+over 8-bit scalar-quantized vectors), `ivfpq` (`IVF256,PQ32x8`, for
+large corpora; falls back to flat when there are too few chunks to
+train it) or `flat` (exact brute force). The
+normalized float embeddings are saved next to the index so the
+retriever can exactly rescore approximate hits; they are stored as
+float16 to halve their size on disk and in the page cache.
 """
 import os
 import json
@@ -17,6 +26,21 @@ DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 OUT_DIR = Path(__file__).resolve().parents[0]
 INDEX_PATH = OUT_DIR / "faiss.index"
 DOCS_PATH = OUT_DIR / "docs.npy"
+EMB_PATH = OUT_DIR / "embeddings.npy"
+
+INDEX_KIND = os.getenv("VRAG_INDEX", "hnsw").lower()
+INDEX_KINDS = ("hnsw", "hnswsq", "ivfpq", "flat")
+
+# HNSW graph: neighbours per node and construction-time beam width
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+
+# IVF-PQ layout: 256 inverted lists, 32 sub-quantizers of 8 bits each.
+IVFPQ_FACTORY = "IVF256,PQ32x8"
+IVFPQ_M = 32
+# faiss wants ~39 training points per k-means centroid (256 IVF lists and
+# 2**8 PQ codes each); smaller corpora get a flat index instead
+IVFPQ_MIN_TRAIN = 39 * 256
 
 def load_text_files(data_dir: Path) -> List[str]:
     docs = []
@@ -35,16 +59,55 @@ def load_text_files(data_dir: Path) -> List[str]:
 
 def chunk_text(text: str, max_words: int = 200, stride: int = 50) -> List[str]:
     words = text.split()
-    chunks = []
-    i = 0
     n = len(words)
-    while i < n:
-        chunk = words[i:i+max_words]
-        chunks.append(" ".join(chunk))
-        if i + max_words >= n:
-            break
-        i += max_words - stride
-    return chunks
+    if n == 0:
+        return []
+    # window starts step by (max_words - stride); the last window is the
+    # first one reaching the end, i.e. starts stop below n - stride
+    starts = range(0, max(n - stride, 1), max_words - stride)
+    return [" ".join(words[s:s + max_words]) for s in starts]
+
+
+def build_index(embeddings, faiss, kind: str = INDEX_KIND):
+    """Build an inner-product index over L2-normalized `embeddings`.
+
+    `kind` is one of "hnsw", "hnswsq", "ivfpq" or "flat". IVF-PQ is only used when
+    the corpus is large enough to train it and the dimension is divisible
+    by the number of sub-quantizers; otherwise an exact `IndexFlatIP` is
+    built.
+    """
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"unknown index kind {kind!r}; expected one of {', '.join(INDEX_KINDS)}")
+    n, dim = embeddings.shape
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.add(embeddings)
+        print(f"Built HNSW index over {n} vectors")
+        return index
+    if kind == "hnswsq":
+        # HNSW graph over 8-bit scalar-quantized vectors (4x smaller than flat)
+        index = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.train(embeddings)
+        index.add(embeddings)
+        print(f"Built HNSW,SQ8 index over {n} vectors")
+        return index
+    if kind == "ivfpq" and n >= IVFPQ_MIN_TRAIN and dim % IVFPQ_M == 0:
+        try:
+            index = faiss.index_factory(dim, IVFPQ_FACTORY, faiss.METRIC_INNER_PRODUCT)
+            index.train(embeddings)
+            index.add(embeddings)
+            print(f"Built {IVFPQ_FACTORY} index over {n} vectors")
+            return index
+        except Exception as e:
+            print("IVF-PQ index build failed, falling back to flat index:", e)
+    elif kind == "ivfpq":
+        print(f"IVF-PQ needs {IVFPQ_MIN_TRAIN} vectors to train (have {n}); using a flat index")
+    index = faiss.IndexFlatIP(dim)
+    index.add(embeddings)
+    print(f"Built flat index over {n} vectors")
+    return index
 
 
 def main():
@@ -57,6 +120,11 @@ def main():
         print("Install sentence-transformers, numpy, faiss-cpu to run ingest")
         return
 
+    # check before the (slow) embedding step rather than failing after it
+    if INDEX_KIND not in INDEX_KINDS:
+        print(f"Unknown VRAG_INDEX={INDEX_KIND!r}; expected one of {', '.join(INDEX_KINDS)}")
+        return
+
     print("Loading text files from", DATA_DIR)
     docs = load_text_files(DATA_DIR)
     if not docs:
@@ -77,23 +145,23 @@ def main():
     model = SentenceTransformer("all-MiniLM-L6-v2")
     embeddings = model.encode(chunks, show_progress_bar=True, convert_to_numpy=True)
 
-    # normalize for cosine (use inner product in FAISS)
-    import numpy as _np
-    norms = _np.linalg.norm(embeddings, axis=1, keepdims=True)
-    norms[norms == 0] = 1.0
-    embeddings = embeddings / norms
+    # normalize for cosine (use inner product in FAISS); einsum gives the
+    # squared norms without a float64 temporary and scaling is in place
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    sq = np.einsum('ij,ij->i', embeddings, embeddings)
+    embeddings *= (1.0 / np.sqrt(np.maximum(sq, 1e-12)))[:, None]
 
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dim)
-    index.add(embeddings.astype('float32'))
+    index = build_index(embeddings, faiss)
 
     # save index and docs/chunks mapping
     faiss.write_index(index, str(INDEX_PATH))
     print("Saved FAISS index to", INDEX_PATH)
 
     # Save chunk texts and source map for retrieval
-    import numpy as np
     np.save(str(DOCS_PATH), np.array(chunks, dtype=object))
+    # fp16 embeddings for exact rescoring of approximate search hits (half
+    # the bytes of float32; the retriever upcasts the few rows it reads)
+    np.save(str(EMB_PATH), embeddings.astype(np.float16))
     # Also save a small metadata file
     meta = {"source_map": source_map, "source_docs": [str(p) for p in sorted(DATA_DIR.iterdir()) if p.is_file()]}
     with open(OUT_DIR / "meta.json", "w", encoding="utf-8") as f:
@@ -103,27 +171,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-import os
-import faiss
-import numpy as np
-from sentence_transformers import SentenceTransformer
-
-model = SentenceTransformer("BAAI/bge-base-en")
-
-documents = []
-data_dir = "data"
-for filename in os.listdir(data_dir):
-    path = os.path.join(data_dir, filename)
-    if not os.path.isfile(path):
-        continue
-    # Open with replacement of invalid bytes to avoid UnicodeDecodeError
-    with open(path, "r", encoding="utf-8", errors="replace") as f:
-        documents.append(f.read())
-
-embeddings = model.encode(documents)
-
-index = faiss.IndexFlatL2(embeddings.shape[1])
-index.add(np.array(embeddings))
-
-faiss.write_index(index, "rag/faiss.index")
-np.save("rag/docs.npy", np.array(documents))
@@ -0,0 +1,103 @@
+"""ONNX Runtime stand-ins for the cross-encoder and sentence embedder.
+
+`tools/export_onnx.py` exports both MiniLM models to ONNX and applies
+dynamic int8 quantization. When the quantized files exist and
+`onnxruntime` + `transformers` are installed, the retriever and reranker
+use these wrappers instead of the PyTorch models; they expose the same
+`encode` / `predict` methods the callers already use. All imports are
+optional so the module is safe to import without the dependencies.
+"""
+import os
+from typing import List, Optional, Sequence
+
+try:
+    import numpy as np
+    import onnxruntime as ort
+    from transformers import AutoTokenizer
+except Exception:
+    np = None
+    ort = None
+    AutoTokenizer = None
+
+
+CE_ONNX_PATH = os.getenv("VRAG_ONNX_CE", "rag/onnx_ce/model_int8.onnx")
+EMBED_ONNX_PATH = os.getenv("VRAG_ONNX_EMBED", "rag/onnx_embed/model_int8.onnx")
+
+
+try:
+    from rag.runtime import num_threads
+except Exception:
+    num_threads = None
+
+
+def _session(model_path: str):
+    opts = ort.SessionOptions()
+    if num_threads is not None:
+        opts.intra_op_num_threads = num_threads()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(model_path, sess_options=opts, providers=["CPUExecutionProvider"])
+
+
+class _OnnxModel:
+    def __init__(self, model_path: str):
+        # the exporter saves the tokenizer next to the model file
+        self.tokenizer = AutoTokenizer.from_pretrained(os.path.dirname(model_path))
+        self.session = _session(model_path)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _run(self, enc) -> "np.ndarray":
+        feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self.input_names}
+        return self.session.run(None, feeds)[0]
+
+
+class OnnxCrossEncoder(_OnnxModel):
+    """int8 cross-encoder with a `CrossEncoder.predict`-compatible call."""
+
+    def predict(self, pairs: Sequence[Sequence[str]], batch_size: int = 32, convert_to_numpy: bool = True, **_):
+        out = []
+        for s in range(0, len(pairs), batch_size):
+            batch = pairs[s:s + batch_size]
+            enc = self.tokenizer(
+                [p[0] for p in batch], [p[1] for p in batch],
+                padding=True, truncation=True, max_length=512, return_tensors="np",
+            )
+            out.append(self._run(enc).reshape(len(batch), -1)[:, 0])
+        return np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+
+
+class OnnxEmbedder(_OnnxModel):
+    """int8 sentence embedder: mean pooling + L2 norm, like all-MiniLM-L6-v2."""
+
+    def encode(self, sentences: List[str], batch_size: int = 32, **_):
+        out = []
+        for s in range(0, len(sentences), batch_size):
+            enc = self.tokenizer(
+                list(sentences[s:s + batch_size]),
+                padding=True, truncation=True, max_length=256, return_tensors="np",
+            )
+            hidden = self._run(enc)
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            out.append(pooled.astype(np.float32))
+        return np.concatenate(out) if out else np.zeros((0, 0), dtype=np.float32)
+
+
+def _load(cls, model_path: str):
+    if ort is None or AutoTokenizer is None or not os.path.exists(model_path):
+        return None
+    try:
+        return cls(model_path)
+    except Exception as e:
+        print(f"[onnx] failed to load {model_path}: {e}")
+        return None
+
+
+def load_cross_encoder(model_path: str = CE_ONNX_PATH) -> Optional[OnnxCrossEncoder]:
+    """Return the quantized cross-encoder, or None if it is unavailable."""
+    return _load(OnnxCrossEncoder, model_path)
+
+
+def load_embedder(model_path: str = EMBED_ONNX_PATH) -> Optional[OnnxEmbedder]:
+    """Return the quantized sentence embedder, or None if it is unavailable."""
+    return _load(OnnxEmbedder, model_path)
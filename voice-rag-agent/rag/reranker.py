@@ -2,37 +2,119 @@
 
 Provides `rerank(query, candidates, top_k)` where candidates is a
 list of document texts. If a cross-encoder model is available it is
-used; otherwise a simple lexical score is returned.
+used; otherwise a simple lexical score is returned. Cross-encoder
+scores are memoized per (query, candidates) so re-issued partials skip
+the forward pass.
 """
+import heapq
+import os
+import threading
+from functools import lru_cache
 from typing import List, Tuple
 
+try:
+    from rag.runtime import configure_threads
+    configure_threads()
+except Exception:
+    pass
+
 try:
     from sentence_transformers import CrossEncoder
 except Exception:
     CrossEncoder = None
 
+try:
+    import torch
+except Exception:
+    torch = None
+
+try:
+    from rag.onnx_models import CE_ONNX_PATH, load_cross_encoder as _load_onnx_cross_encoder
+except Exception:
+    CE_ONNX_PATH = None
+    _load_onnx_cross_encoder = None
+
+
+CROSS_ENCODER_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+
+_cross = None
+_cross_lock = threading.Lock()
+# stored in _cross when loading failed, so later calls skip straight to
+# the lexical fallback instead of retrying (and timing out) every turn
+_LOAD_FAILED = object()
+
+
+def _cross_encoder_available() -> bool:
+    if _cross is _LOAD_FAILED:
+        return False
+    if _cross is not None or CrossEncoder is not None:
+        return True
+    return _load_onnx_cross_encoder is not None and os.path.exists(CE_ONNX_PATH)
+
+
+def _get_cross_encoder():
+    """Load the cross-encoder once and reuse it for every call.
+
+    Prefers the int8 ONNX export from `tools/export_onnx.py` when present.
+    Returns None if neither backend could be loaded.
+    """
+    global _cross
+    if _cross is None:
+        with _cross_lock:
+            if _cross is None and _load_onnx_cross_encoder is not None:
+                _cross = _load_onnx_cross_encoder()
+            if _cross is None:
+                try:
+                    if CrossEncoder is None:
+                        raise RuntimeError("no ONNX export and sentence-transformers is not installed")
+                    device = 'cuda' if torch is not None and torch.cuda.is_available() else 'cpu'
+                    _cross = CrossEncoder(CROSS_ENCODER_MODEL, device=device)
+                except Exception as e:
+                    print(f"[rerank] cross-encoder unavailable, using lexical scores: {e}")
+                    _cross = _LOAD_FAILED
+    return None if _cross is _LOAD_FAILED else _cross
+
+
+@lru_cache(maxsize=4096)
+def _token_set(text: str) -> frozenset:
+    # candidates come from the same corpus every turn, so reuse their tokens
+    return frozenset(text.lower().split())
+
+
+@lru_cache(maxsize=256)
+def _cross_scores(query: str, candidates: Tuple[str, ...]) -> Tuple[float, ...]:
+    model = _get_cross_encoder()
+    # Length-sort the pairs so each mini-batch pads only to its own longest
+    # candidate, then restore the caller's order.
+    order = sorted(range(len(candidates)), key=lambda i: len(candidates[i].split()))
+    pairs = [[query, candidates[i]] for i in order]
+    sorted_scores = model.predict(pairs, batch_size=16, convert_to_numpy=True)
+    scores = [0.0] * len(candidates)
+    for pos, i in enumerate(order):
+        scores[i] = float(sorted_scores[pos])
+    return tuple(scores)
+
 
 def rerank(query: str, candidates: List[str], top_k: int = 5) -> List[Tuple[float, str]]:
     """Return list of (score, doc) ordered best-first."""
     if not candidates:
         return []
 
-    if CrossEncoder is not None:
+    if _cross_encoder_available() and _get_cross_encoder() is not None:
         try:
-            model = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
-            pairs = [[query, c] for c in candidates]
-            scores = model.predict(pairs)
-            ranked = sorted(zip(scores, candidates), key=lambda x: -x[0])[:top_k]
+            scores = _cross_scores(query, tuple(candidates))
+            ranked = heapq.nlargest(top_k, zip(scores, candidates), key=lambda x: x[0])
             return [(float(s), d) for s, d in ranked]
         except Exception:
             pass
 
     # Fallback: simple overlap score
-    qset = set(query.lower().split())
+    qset = _token_set(query)
     scored = []
     for d in candidates:
-        score = len(qset.intersection(set(d.lower().split())))
+        fs = _token_set(d)
+        # count membership instead of materializing the intersection set
+        score = sum(1 for t in qset if t in fs)
         scored.append((float(score), d))
-    scored.sort(key=lambda x: -x[0])
-    return scored[:top_k]
+    return heapq.nlargest(top_k, scored, key=lambda x: x[0])
 
@@ -1,54 +1,234 @@
 """Hybrid retriever: FAISS vector search + BM25 fallback.
 
 This module provides a `hybrid_search(query, k=5)` function that
-attempts to use a vector index (faiss + sentence-transformers) if
-available, and falls back to BM25 (rank_bm25) or a simple lexical
-scorer when dependencies are missing. All imports are optional so the
+attempts to use a vector index (faiss + the int8 ONNX embedder, else
+sentence-transformers) if available, and falls back to BM25 (the sparse scorer in `rag/bm25.py`,
+else rank_bm25) or a simple lexical scorer when dependencies are
+missing. All imports are optional so the
 module is safe to import during development.
+
+When the float embeddings saved by `ingest.py` are present, vector search
+over-fetches from the (possibly product-quantized) FAISS index and
+rescores the candidates exactly against the memory-mapped embeddings.
 """
-from typing import List, Tuple
+from collections import Counter, OrderedDict
+from typing import Dict, List, Tuple
+import heapq
 import os
+import threading
+
+# thread pools must be sized before the model imports below load torch
+try:
+    from rag.runtime import configure_threads
+    configure_threads()
+except Exception:
+    pass
 
 try:
     import numpy as np
-    from sentence_transformers import SentenceTransformer
     import faiss
 except Exception:
     np = None
-    SentenceTransformer = None
     faiss = None
 
+# only needed when no ONNX embedder export is present
+try:
+    from sentence_transformers import SentenceTransformer
+except Exception:
+    SentenceTransformer = None
+
 try:
     from rank_bm25 import BM25Okapi
 except Exception:
     BM25Okapi = None
 
+try:
+    from rag.bm25 import SparseBM25
+except Exception:
+    SparseBM25 = None
+
+try:
+    from rag.onnx_models import load_embedder as _load_onnx_embedder
+except Exception:
+    _load_onnx_embedder = None
+
 
 _index = None
 _docs = []
+# object array view of _docs so result lookup is one fancy-index op
+_doc_array = None
 _embedder = None
+_embeddings = None
+_embedder_lock = threading.Lock()
+_bm25 = None
+# lexical fallback: per-doc token sets and token -> doc ids postings
+_doc_tokens: List[frozenset] = []
+_postings: Dict[str, List[int]] = {}
+# query -> float32 embedding bytes, least recently used first
+_emb_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_emb_cache_lock = threading.Lock()
+
+# IVF lists probed per query (ignored by non-IVF indexes); tune with
+# tools/tune_nprobe.py
+try:
+    NPROBE = int(os.getenv("VRAG_NPROBE", "8"))
+except ValueError:
+    NPROBE = 8
+# HNSW search beam width (ignored by non-HNSW indexes)
+EF_SEARCH = 64
+# candidates fetched per requested result before exact rescoring
+RESCORE_FACTOR = 4
+# distinct query strings whose embeddings are memoized
+EMBED_CACHE_SIZE = 512
 
 
-def load_index(index_path: str = "rag/faiss.index", docs_path: str = "rag/docs.npy"):
-    global _index, _docs, _embedder
+def load_index(
+    index_path: str = "rag/faiss.index",
+    docs_path: str = "rag/docs.npy",
+    emb_path: str = "rag/embeddings.npy",
+):
+    global _index, _docs, _doc_array, _embedder, _embeddings, _bm25, _doc_tokens, _postings
     if faiss is None or np is None:
         return False
     if not os.path.exists(index_path) or not os.path.exists(docs_path):
         return False
     try:
+        # read_index copies the whole file into memory, so there is nothing
+        # to prefetch for the index itself
         _index = faiss.read_index(index_path)
-        _docs = np.load(docs_path, allow_pickle=True).tolist()
-        _embedder = SentenceTransformer("all-MiniLM-L6-v2")
-        return True
+        _set_search_params(_index)
+        _doc_array = np.asarray(np.load(docs_path, allow_pickle=True), dtype=object)
+        _docs = _doc_array.tolist()
     except Exception:
         return False
+    # BM25 statistics depend only on the corpus, so build them once here,
+    # before the embedder: BM25 still serves queries if the model fails
+    _bm25 = _bm25_from_documents(_docs)
+    _doc_tokens, _postings = _build_postings(_docs)
+    try:
+        # load the embedder once; concurrent callers wait for the first load
+        with _embedder_lock:
+            if _embedder is None and _load_onnx_embedder is not None:
+                # int8 ONNX export from tools/export_onnx.py, when present
+                _embedder = _load_onnx_embedder()
+            if _embedder is None:
+                if SentenceTransformer is None:
+                    return False
+                _embedder = SentenceTransformer("all-MiniLM-L6-v2")
+                _emb_cache.clear()
+    except Exception:
+        return False
+    # Optional: float embeddings for exact rescoring (memory-mapped, not read)
+    _embeddings = None
+    if os.path.exists(emb_path):
+        try:
+            _prefetch(emb_path)
+            emb = np.load(emb_path, mmap_mode="r")
+            if emb.shape[0] == len(_docs):
+                _embeddings = emb
+        except Exception:
+            _embeddings = None
+    return True
+
+
+def _set_search_params(index) -> None:
+    # ParameterSpace also reaches IVF indexes wrapped in e.g. a
+    # PreTransform, which expose no `nprobe` attribute of their own
+    try:
+        faiss.ParameterSpace().set_index_parameter(index, "nprobe", NPROBE)
+    except Exception:
+        pass  # not an IVF index
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = EF_SEARCH
+
+
+def _prefetch(path: str) -> None:
+    """Ask the kernel to pull `path` into the page cache ahead of first use.
+
+    Used for the memory-mapped embeddings, whose rows are otherwise faulted
+    in from disk by the first rescoring queries. No-op where posix_fadvise
+    is unavailable (e.g. Windows).
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, os.path.getsize(path), os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def _tokenize(text: str) -> List[str]:
+    return text.lower().split()
 
 
 def _bm25_from_documents(documents: List[str]):
-    if BM25Okapi is None:
+    if not documents:
+        return None
+    tokenized = [_tokenize(d) for d in documents]
+    # sparse-matrix scorer (numpy + scipy) first, then rank_bm25
+    for cls in (SparseBM25, BM25Okapi):
+        if cls is None:
+            continue
+        try:
+            return cls(tokenized)
+        except Exception:
+            continue
+    return None
+
+
+def _build_postings(documents: List[str]):
+    doc_tokens = [frozenset(_tokenize(d)) for d in documents]
+    postings: Dict[str, List[int]] = {}
+    for i, toks in enumerate(doc_tokens):
+        for t in toks:
+            postings.setdefault(t, []).append(i)
+    return doc_tokens, postings
+
+
+def encode_queries(queries: List[str]):
+    """Return a (len(queries), dim) float32 array of query embeddings.
+
+    Cached queries are served from the LRU cache; the misses are encoded
+    together in a single batched forward pass and cached. Returns None if
+    no embedder is loaded.
+    """
+    if _embedder is None or np is None:
         return None
-    tokenized = [d.split() for d in documents]
-    return BM25Okapi(tokenized)
+    with _emb_cache_lock:
+        cached = {}
+        for q in queries:
+            if q in _emb_cache:
+                _emb_cache.move_to_end(q)
+                cached[q] = _emb_cache[q]
+    misses = [q for q in dict.fromkeys(queries) if q not in cached]
+    if misses:
+        encoded = np.asarray(_embedder.encode(misses, batch_size=len(misses)), dtype=np.float32)
+        with _emb_cache_lock:
+            for q, e in zip(misses, encoded):
+                # bytes keep the cached value immutable; callers get fresh arrays
+                cached[q] = _emb_cache[q] = e.tobytes()
+            while len(_emb_cache) > EMBED_CACHE_SIZE:
+                _emb_cache.popitem(last=False)
+    return np.stack([np.frombuffer(cached[q], dtype=np.float32) for q in queries])
+
+
+def _search_rescored(emb, k: int) -> List[Tuple[float, str]]:
+    """Over-fetch `RESCORE_FACTOR * k` hits and rank them by exact cosine."""
+    _, I = _index.search(emb, k * RESCORE_FACTOR)
+    ids = I[0][(I[0] >= 0) & (I[0] < len(_doc_array))]  # FAISS pads misses with -1
+    # sorted unique ids keep reads from the memory-mapped array sequential
+    ids = np.unique(ids)
+    if ids.size == 0:
+        return []
+    q = emb[0] / max(float(np.linalg.norm(emb[0])), 1e-12)
+    # rows may be stored as float16; upcast only the candidates
+    exact = np.asarray(_embeddings[ids], dtype=np.float32) @ q
+    top = np.argsort(-exact, kind="stable")[:k]
+    return list(zip(exact[top].tolist(), _doc_array[ids[top]].tolist()))
 
 
 def hybrid_search(query: str, k: int = 5) -> List[Tuple[float, str]]:
@@ -57,59 +237,40 @@ def hybrid_search(query: str, k: int = 5) -> List[Tuple[float, str]]:
     Scores are higher = better. If vector search is available it is
     used; otherwise BM25 or lexical fallback is used.
     """
+    global _doc_tokens, _postings
     # Try vector search
     if _index is not None and _embedder is not None:
         try:
-            emb = _embedder.encode([query])
-            D, I = _index.search(np.array(emb).astype('float32'), k)
-            results = []
-            for score, idx in zip(D[0], I[0]):
-                if idx < 0 or idx >= len(_docs):
-                    continue
-                results.append((float(-score), _docs[idx]))
-            return results
+            # repeated partials from the realtime pipeline hit the cache
+            emb = encode_queries([query])
+            if _embeddings is not None:
+                return _search_rescored(emb, k)
+            D, I = _index.search(emb, k)
+            mask = (I[0] >= 0) & (I[0] < len(_doc_array))
+            # inner-product index: larger score is already better
+            return list(zip(D[0][mask].tolist(), _doc_array[I[0][mask]].tolist()))
         except Exception:
             pass
 
-    # Try BM25 over in-memory docs
-    if _docs and BM25Okapi is not None:
+    # Try BM25 over in-memory docs (index prebuilt by load_index)
+    if _docs and _bm25 is not None:
         try:
-            bm25 = _bm25_from_documents(_docs)
-            scores = bm25.get_scores(query.split())
-            ranked = sorted(enumerate(scores), key=lambda x: -x[1])[:k]
+            scores = _bm25.get_scores(_tokenize(query))
+            ranked = heapq.nlargest(k, enumerate(scores), key=lambda x: x[1])
             return [(float(s), _docs[i]) for i, s in ranked]
         except Exception:
             pass
 
     # Simple lexical fallback (count overlap)
     if _docs:
-        qset = set(query.lower().split())
-        scored = []
-        for d in _docs:
-            score = len(qset.intersection(set(d.lower().split())))
-            if score > 0:
-                scored.append((float(score), d))
-        scored.sort(key=lambda x: -x[0])
-        return scored[:k]
+        if len(_doc_tokens) != len(_docs):
+            _doc_tokens, _postings = _build_postings(_docs)
+        # only docs sharing a query token are visited; overlap = posting hits
+        counts = Counter()
+        for t in set(_tokenize(query)):
+            counts.update(_postings.get(t, ()))
+        # ties keep corpus order, as the previous stable sort did
+        top = heapq.nlargest(k, counts.items(), key=lambda x: (x[1], -x[0]))
+        return [(float(c), _docs[i]) for i, c in top]
 
     return []
-import faiss
-import numpy as np
-from sentence_transformers import SentenceTransformer
-from rank_bm25 import BM25Okapi
-
-model = SentenceTransformer("BAAI/bge-base-en")
-index = faiss.read_index("rag/faiss.index")
-docs = np.load("rag/docs.npy", allow_pickle=True)
-
-tokenized = [doc.split() for doc in docs]
-bm25 = BM25Okapi(tokenized)
-
-def hybrid_search(query, k=5):
-    q_emb = model.encode([query])
-    _, I = index.search(q_emb, k)
-    vector_hits = [docs[i] for i in I[0]]
-
-    bm25_hits = bm25.get_top_n(query.split(), docs, n=k)
-
-    return list(set(vector_hits + bm25_hits))
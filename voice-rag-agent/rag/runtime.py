@@ -0,0 +1,44 @@
+"""CPU thread configuration shared by the retriever and reranker.
+
+`configure_threads()` sets torch's intra/inter-op thread pools once,
+before any model is loaded. The intra-op count comes from `VRAG_THREADS`
+and defaults to the core count capped at 8, leaving headroom for the
+TTS playback thread. torch is optional; without it only the count is
+computed (ONNX Runtime sessions use it too).
+"""
+import os
+
+try:
+    import torch
+except Exception:
+    torch = None
+
+
+INTEROP_THREADS = 2
+
+_configured = False
+
+
+def num_threads() -> int:
+    try:
+        return max(1, int(os.environ["VRAG_THREADS"]))
+    except Exception:
+        return min(8, os.cpu_count() or 4)
+
+
+def configure_threads() -> None:
+    global _configured
+    if _configured:
+        return
+    _configured = True
+    if torch is None:
+        return
+    try:
+        torch.set_num_threads(num_threads())
+    except Exception:
+        pass
+    try:
+        # raises if inter-op work already started; the default is fine then
+        torch.set_num_interop_threads(INTEROP_THREADS)
+    except Exception:
+        pass
@@ -7,31 +7,35 @@ partial transcripts (from ASR) and performs parallel steps:
 - In parallel, run query rewriting, hybrid retrieval and cross-encoder
   reranking to produce high-quality context.
 - When the reranker is done, call the LLM again with the retrieved
-  context to produce the final answer and play it (replacing the
-  filler response audibly).
+  context to produce the final answer while the filler is still
+  playing, then play it once the filler finishes.
 
 Notes:
 - This is a prototype that uses synchronous LLM/TTS functions via
   `asyncio.to_thread` so it can run without special async SDKs.
-- Streaming token-level LLM/TTS is not implemented (depends on
-  provider SDKs). The filler is generated and played quickly to
-  reduce perceived latency; the final response replaces it.
+- The final answer is streamed from the LLM and spoken sentence by
+  sentence through `speak_stream`, so playback starts with the first
+  complete sentence instead of the full completion and each following
+  sentence is synthesized while the previous one plays. The filler is generated and played
+  quickly to reduce perceived latency.
 """
 from __future__ import annotations
 
 import asyncio
+import queue
+import threading
 import time
 import logging
 import json
 from dataclasses import dataclass, asdict
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
-from app import get_llm_response
+from app import get_llm_response, stream_llm_response
 from rag.rewrite import rewrite_query
 from rag.retriever import hybrid_search
 from rag.reranker import rerank
-from postprocess import postprocess_for_voice
-from speech.tts import speak as tts_speak
+from postprocess import iter_sentences, postprocess_for_voice
+from speech.tts import speak as tts_speak, speak_stream as tts_speak_stream
 
 
 logger = logging.getLogger("realtime")
@@ -93,11 +97,22 @@ class RealtimeCoordinator:
     async def _run_pipeline(self, partial: str) -> None:
         start_ts = time.time()
 
-        # 1) Immediately generate a short filler from LLM and speak it
+        # 1) start retrieval+rerank first: it does not depend on the filler
+        retrieval_task = asyncio.create_task(self._retrieve_and_rerank(partial))
+        # stamp completion when it happens; the await below only runs once
+        # the filler LLM call has returned
+        retrieval_end: List[float] = []
+        retrieval_task.add_done_callback(lambda _: retrieval_end.append(time.time()))
+
+        # 2) meanwhile generate a short filler from LLM and speak it
         filler_prompt = f"You are a helpful assistant. Give a very short acknowledgement for: {partial}"
 
         # run LLM in a thread to avoid blocking event loop
-        filler_text = await asyncio.to_thread(get_llm_response, filler_prompt)
+        try:
+            filler_text = await asyncio.to_thread(get_llm_response, filler_prompt)
+        except asyncio.CancelledError:
+            retrieval_task.cancel()
+            return
         # postprocess small filler to keep it short
         filler_text = filler_text.split(".")[0] + "."
 
@@ -105,31 +120,43 @@ class RealtimeCoordinator:
         loop = asyncio.get_running_loop()
         filler_play = loop.run_in_executor(None, tts_speak, filler_text)
 
-        # 2) start retrieval+rerank in parallel
-        retrieval_task = asyncio.create_task(self._retrieve_and_rerank(partial))
-
         # Wait for retrieval to finish
         try:
             contexts = await retrieval_task
         except asyncio.CancelledError:
+            retrieval_task.cancel()
             return
 
-        retrieval_time = time.time() - start_ts
+        retrieval_time = (retrieval_end[0] if retrieval_end else time.time()) - start_ts
 
-        # 3) Call LLM with context and user partial to produce final answer
+        # 3) Stream the final answer from the LLM with context and user
+        # partial. Start it now so generation overlaps the filler playback;
+        # complete sentences queue up until the filler is done.
         ctx_text = "\n\n".join(contexts)
         final_prompt = f"Context:\n{ctx_text}\n\nQuestion: {partial}"
-        final_answer = await asyncio.to_thread(get_llm_response, final_prompt)
-        final_answer = postprocess_for_voice(final_answer)
+        sentences: "queue.Queue[Optional[str]]" = queue.Queue()
+        stop = threading.Event()
+        loop.run_in_executor(None, self._stream_sentences, final_prompt, sentences, stop)
 
         # wait for filler playback to finish before playing final (optional)
         try:
             await filler_play
+        except asyncio.CancelledError:
+            stop.set()
+            return
         except Exception:
             pass
 
-        # play final answer
-        await asyncio.to_thread(tts_speak, final_answer)
+        # play the final answer through speak_stream: each sentence is sent
+        # to TTS as soon as it is complete, so the next one synthesizes
+        # while the current one plays; returns once playback has ended
+        try:
+            final_answer = await asyncio.to_thread(
+                tts_speak_stream, self._voice_sentences(sentences, stop, start_ts)
+            )
+        except asyncio.CancelledError:
+            stop.set()
+            return
 
         # record metrics
         try:
@@ -145,6 +172,36 @@ class RealtimeCoordinator:
         total_time = time.time() - start_ts
         logger.info("[realtime] retrieval_time=%.3fs total_time=%.3fs", retrieval_time, total_time)
 
+    @staticmethod
+    def _stream_sentences(prompt: str, sentences: "queue.Queue[Optional[str]]", stop: threading.Event) -> None:
+        """Producer thread: push each streamed sentence, then a None sentinel."""
+        try:
+            for sentence in iter_sentences(stream_llm_response(prompt)):
+                if stop.is_set():
+                    break
+                sentences.put(sentence)
+        except Exception:
+            logger.exception("final LLM stream failed")
+        finally:
+            sentences.put(None)
+
+    @staticmethod
+    def _voice_sentences(sentences: "queue.Queue[Optional[str]]", stop: threading.Event, start_ts: float) -> Iterator[str]:
+        """Postprocessed sentences for speak_stream, until the sentinel or `stop`."""
+        first = True
+        while not stop.is_set():
+            try:
+                sentence = sentences.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if sentence is None:
+                return
+            if first:
+                logger.info("[realtime] first_sentence_time=%.3fs", time.time() - start_ts)
+                first = False
+            # newline-terminated so speak_stream releases it immediately
+            yield postprocess_for_voice(sentence) + "\n"
+
     def dump_metrics(self, path: str = "realtime_metrics.json"):
         try:
             self.metrics.dump(path)
@@ -156,12 +213,13 @@ class RealtimeCoordinator:
         # rewrite with conversation history
         q2 = rewrite_query(query, self.history)
 
-        # hybrid search
-        candidates = hybrid_search(q2, k=8)
+        # hybrid search (in a thread so the filler LLM/TTS keep running);
+        # repeated partials hit the retriever's query-embedding LRU
+        candidates = await asyncio.to_thread(hybrid_search, q2, 8)
         texts = [c[1] for c in candidates]
 
         # rerank (may be CPU-heavy)
-        reranked = rerank(q2, texts, top_k=3)
+        reranked = await asyncio.to_thread(rerank, q2, texts, 3)
         # rerank returns list of (score, text)
         top_texts = [t for _, t in reranked]
         return top_texts
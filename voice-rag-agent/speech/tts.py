@@ -1,103 +1,769 @@
 """Text-to-speech helper using ElevenLabs SDK.
 
 This module initializes its own ElevenLabs client from environment
-variables to avoid circular imports. It decodes MP3 output using
-`pydub` when available, falls back to `soundfile` if possible, and
-saves the raw file for manual inspection if decoding is unavailable.
+variables to avoid circular imports. Audio is requested as raw PCM, so
+no decode step is needed: when the SDK exposes a streaming API and
+`sounddevice` is present, `speak()` writes chunks to a persistent output
+stream as they arrive; otherwise the whole clip is downloaded and played
+straight from a numpy view. MP3 left in the cache by earlier versions is
+decoded with `miniaudio`, `pydub` or `soundfile`, or saved for manual
+inspection if decoding is unavailable.
+
+`speak_stream()` streams PCM the same way for streamed LLM output,
+synthesizing each sentence as soon as it is complete while earlier ones
+play.
+`speak_async()` coalesces concurrent requests (e.g. several sessions on
+one server) into small batches that are synthesized together.
+
+Synthesized audio is cached by (voice, model, text) in memory and under
+`TTS_CACHE_DIR` (default `~/.cache/voice-rag/tts`), so repeated phrases
+are played without another ElevenLabs request.
 """
 
+import asyncio
+import base64
+import hashlib
 import io
+import math
+import mmap
 import os
+import queue
+import threading
+import types
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from typing import Iterable, Optional
+
+import numpy as np
 from dotenv import load_dotenv
 
+from postprocess import iter_sentences
+from utils.http import make_http_client, start_warmup
+
 load_dotenv()
 
-try:
-    from elevenlabs.client import ElevenLabs
-except Exception:
-    ElevenLabs = None
 try:
     from elevenlabs.client import ElevenLabs
 except Exception:
     ElevenLabs = None
 
-try:
-    import sounddevice as sd
-except Exception:
-    sd = None
 
-import numpy as np
+class _Backends:
+    """Audio/local-TTS libraries, each imported on first use.
 
-# Optional libraries for decoding
-try:
-    from pydub import AudioSegment
-except Exception:
-    AudioSegment = None
+    pydub (with its ffmpeg probing), soundfile, sounddevice, miniaudio,
+    zstandard, scipy's resample_poly and pyttsx3 are slow to import, so
+    module load pays for none of them and a decoder is only imported if
+    the paths before it failed. Each attribute is the module (or
+    function/class) or None when the library is missing.
+    """
 
-try:
-    import soundfile as sf
-except Exception:
-    sf = None
+    @cached_property
+    def sd(self):
+        try:
+            import sounddevice
+            return sounddevice
+        except Exception:
+            return None
+
+    @cached_property
+    def miniaudio(self):
+        try:
+            import miniaudio
+            return miniaudio
+        except Exception:
+            return None
+
+    @cached_property
+    def AudioSegment(self):
+        try:
+            from pydub import AudioSegment
+            return AudioSegment
+        except Exception:
+            return None
+
+    @cached_property
+    def sf(self):
+        try:
+            import soundfile
+            return soundfile
+        except Exception:
+            return None
+
+    @cached_property
+    def zstd(self):
+        try:
+            import zstandard
+            return zstandard
+        except Exception:
+            return None
+
+    @cached_property
+    def resample_poly(self):
+        try:
+            from scipy.signal import resample_poly
+            return resample_poly
+        except Exception:
+            return None
+
+    @cached_property
+    def pyttsx3(self):
+        try:
+            import pyttsx3
+            return pyttsx3
+        except Exception:
+            return None
+
+
+_backends = _Backends()
+
+ELEVENLABS_BASE_URL = "https://api.elevenlabs.io"
 
 # Initialize ElevenLabs client from env to avoid circular imports
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID")
 eleven_client = None
+_http = None
 if ElevenLabs is not None and ELEVENLABS_API_KEY:
+    # pooled keep-alive client shared by every TTS request
+    _http = make_http_client()
     try:
-        eleven_client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
+        if _http is not None:
+            eleven_client = ElevenLabs(api_key=ELEVENLABS_API_KEY, httpx_client=_http)
+        else:
+            eleven_client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
     except Exception:
-        eleven_client = None
+        try:
+            eleven_client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
+        except Exception:
+            eleven_client = None
 
 
-def speak(text: str):
-    print("🔊 Speaking...")
+TTS_MODEL_ID = "eleven_multilingual_v2"
+# Non-streaming convert() path: raw 16-bit mono PCM, played with no decode
+# step. Entries cached as MP3 before the switch are still decoded and played.
+TTS_OUTPUT_FORMAT = "pcm_16000"
+TTS_SAMPLE_RATE = 16000
+LEGACY_OUTPUT_FORMAT = "mp3_44100_128"
 
-    if eleven_client is None or not VOICE_ID:
-        print("[TTS skipped] ElevenLabs client or VOICE_ID not configured")
-        # Fallback: attempt local TTS engine (pyttsx3) so speech still works offline
+# Streaming path: raw 16-bit mono PCM written to the audio device as it
+# arrives (no MP3 decode); the flash model has the lowest synthesis latency.
+STREAM_MODEL_ID = os.getenv("TTS_STREAM_MODEL", "eleven_flash_v2_5")
+STREAM_OUTPUT_FORMAT = "pcm_22050"
+STREAM_SAMPLE_RATE = 22050
+
+# Synthesized audio cache: bounded in-memory LRU in front of an on-disk
+# directory (set TTS_CACHE_DIR to an empty string to disable the disk tier).
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "voice-rag", "tts"))
+TTS_MEM_CACHE_SIZE = 256
+_TTS_MEM_CACHE: "OrderedDict[str, bytes]" = OrderedDict()
+_TTS_CACHE_LOCK = threading.Lock()
+
+
+def _cache_key(text: str, model_id: str, output_format: str) -> str:
+    """Cache file name for an utterance; the extension records the format."""
+    digest = hashlib.sha256(f"{VOICE_ID}|{model_id}|{output_format}|{text}".encode("utf-8")).hexdigest()
+    return digest + (".mp3" if output_format.startswith("mp3") else ".pcm")
+
+
+# disk entries for raw PCM are zstd-compressed when zstandard is installed;
+# MP3 is already compressed and is stored as-is
+TTS_CACHE_ZSTD_LEVEL = 3
+
+
+def _cache_path(key: str, compressed: bool) -> str:
+    return os.path.join(TTS_CACHE_DIR, key + ".zst" if compressed else key)
+
+
+def _read_cached(key: str) -> Optional[bytes]:
+    zstd = _backends.zstd if key.endswith(".pcm") else None
+    if zstd is not None:
         try:
-            import pyttsx3
+            with open(_cache_path(key, True), "rb") as f:
+                # the kernel pages the file in as the decompressor reads it
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return zstd.ZstdDecompressor().decompress(mm)
+        except (OSError, ValueError):
+            pass
+        except Exception as e:
+            print(f"[TTS cache] failed to decompress {key}: {e}")
+    try:
+        with open(_cache_path(key, False), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _cache_get(key: str) -> Optional[bytes]:
+    with _TTS_CACHE_LOCK:
+        data = _TTS_MEM_CACHE.get(key)
+        if data is not None:
+            _TTS_MEM_CACHE.move_to_end(key)
+            return data
+    if not TTS_CACHE_DIR:
+        return None
+    data = _read_cached(key)
+    if not data:
+        return None
+    _cache_put_mem(key, data)
+    return data
+
+
+def _cache_put_mem(key: str, data: bytes):
+    with _TTS_CACHE_LOCK:
+        _TTS_MEM_CACHE[key] = data
+        _TTS_MEM_CACHE.move_to_end(key)
+        while len(_TTS_MEM_CACHE) > TTS_MEM_CACHE_SIZE:
+            _TTS_MEM_CACHE.popitem(last=False)
+
+
+def _cache_put(key: str, data: bytes):
+    _cache_put_mem(key, data)
+    if not TTS_CACHE_DIR:
+        return
+    zstd = _backends.zstd if key.endswith(".pcm") else None
+    try:
+        if zstd is not None:
+            data = zstd.ZstdCompressor(level=TTS_CACHE_ZSTD_LEVEL).compress(data)
+        os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        final = _cache_path(key, zstd is not None)
+        tmp = f"{final}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        # atomic rename: readers never see a partially written file
+        os.replace(tmp, final)
+    except Exception as e:
+        print(f"[TTS cache] failed to write {key}: {e}")
+
+
+# Decoded (non-PCM-stream) playback runs in the background: sd.OutputStream
+# pulls samples from a callback and sets the utterance's Event when done.
+# A new utterance waits for the previous one, so playback stays in order.
+_playback_done = threading.Event()
+_playback_done.set()
+_playback_stream = None
+_playback_lock = threading.Lock()
+
+
+def _wait_playback():
+    """Block until the utterance currently playing (if any) has finished."""
+    _playback_done.wait()
+
+
+def _start_playback(audio_np, samplerate: int) -> bool:
+    """Start playing float32 samples without waiting for them to finish.
+
+    Returns False when sounddevice is unavailable or the stream fails to
+    open; otherwise `speak(..., block=False)` callers can barrier on the
+    Event it returns.
+    """
+    global _playback_done, _playback_stream
+    sd = _backends.sd
+    if sd is None:
+        print("[Audio playback skipped] sounddevice not available")
+        return False
+    audio_np = np.ascontiguousarray(audio_np, dtype=np.float32)
+    if audio_np.ndim == 1:
+        audio_np = audio_np.reshape((-1, 1))
+    pos = 0
+
+    def callback(outdata, frames, time_info, status):
+        nonlocal pos
+        chunk = audio_np[pos : pos + frames]
+        n = len(chunk)
+        outdata[:n] = chunk
+        pos += n
+        if n < frames:
+            outdata[n:] = 0
+            raise sd.CallbackStop
+
+    with _playback_lock:
+        _wait_playback()
+        if _playback_stream is not None:
+            try:
+                _playback_stream.close()
+            except Exception:
+                pass
+            _playback_stream = None
+        done = threading.Event()
+        try:
+            stream = sd.OutputStream(
+                samplerate=samplerate,
+                channels=audio_np.shape[1],
+                dtype="float32",
+                callback=callback,
+                finished_callback=done.set,
+            )
+            stream.start()
+        except Exception as e:
+            print(f"[TTS playback failed] {e}")
+            return False
+        _playback_done, _playback_stream = done, stream
+    return True
+
+
+_pcm_out = None
+_pcm_out_lock = threading.Lock()
+
+
+def _get_pcm_stream():
+    """Open the raw PCM output stream once and keep it for later utterances."""
+    global _pcm_out
+    with _pcm_out_lock:
+        if _pcm_out is None:
+            _pcm_out = _backends.sd.RawOutputStream(samplerate=STREAM_SAMPLE_RATE, channels=1, dtype="int16")
+            _pcm_out.start()
+        return _pcm_out
+
+
+def _play_pcm(pcm: bytes) -> bool:
+    """Play 16-bit mono PCM at STREAM_SAMPLE_RATE; False if no audio device."""
+    if _backends.sd is None:
+        return False
+    try:
+        _wait_playback()
+        # whole int16 frames only
+        _get_pcm_stream().write(pcm[: len(pcm) - (len(pcm) % 2)])
+        return True
+    except Exception as e:
+        print(f"[TTS PCM playback failed] {e}")
+        return False
+
+
+class _PcmWriter:
+    """Write int16 PCM chunks to the output stream in whole frames.
+
+    Network chunk boundaries can split a sample, so an odd trailing byte
+    is held back and prepended to the next chunk.
+    """
+
+    def __init__(self):
+        self.out = _get_pcm_stream()
+        self.carry = b""
+
+    def write(self, chunk: bytes):
+        data = self.carry + bytes(chunk)
+        cut = len(data) - (len(data) % 2)
+        # don't talk over a decoded utterance still playing
+        _wait_playback()
+        self.out.write(data[:cut])
+        self.carry = data[cut:]
+
+
+def _pcm_chunks(text: str):
+    """Return an iterator of raw PCM chunks for `text`, or None if the SDK
+    has no streaming API."""
+    tts_api = eleven_client.text_to_speech
+    stream_fn = getattr(tts_api, "stream", None) or getattr(tts_api, "convert_as_stream", None)
+    if stream_fn is None:
+        return None
+    chunks = stream_fn(
+        voice_id=VOICE_ID,
+        model_id=STREAM_MODEL_ID,
+        text=text,
+        output_format=STREAM_OUTPUT_FORMAT,
+        optimize_streaming_latency=3,
+    )
+    return (c for c in chunks if isinstance(c, (bytes, bytearray)) and c)
+
+
+def _speak_streaming(text: str, cache_key: str) -> bool:
+    """Stream PCM from ElevenLabs straight to the audio device.
+
+    Returns False (so the caller falls back to convert()) when
+    sounddevice or the SDK's streaming API is unavailable, or when the
+    stream fails before any audio was played.
+    """
+    if _backends.sd is None:
+        return False
+
+    pcm = bytearray()
+    try:
+        chunks = _pcm_chunks(text)
+        if chunks is None:
+            return False
+        writer = _PcmWriter()
+        for chunk in chunks:
+            pcm.extend(chunk)
+            writer.write(chunk)
+    except Exception as e:
+        print(f"[TTS stream failed] {e}")
+        # partially played audio must not be repeated by the fallback
+        return bool(pcm)
+
+    if not pcm:
+        return False
+    _cache_put(cache_key, bytes(pcm))
+    return True
+
+
+# Sentence pipelining for speak_stream: up to two sentences synthesize
+# while an earlier one plays.
+_SYNTH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tts-synth")
+# queued instead of PCM when a sentence could not be streamed
+_FALLBACK = object()
+
+
+def _fetch_sentence(sentence: str, chunks: "queue.Queue"):
+    """Synthesis worker: push the sentence's PCM chunks, then None."""
+    pcm_key = _cache_key(sentence, STREAM_MODEL_ID, STREAM_OUTPUT_FORMAT)
+    pcm = bytearray()
+    try:
+        cached = _cache_get(pcm_key)
+        if cached is not None:
+            chunks.put(cached)
+            return
+        stream = _pcm_chunks(sentence)
+        if stream is None:
+            chunks.put(_FALLBACK)
+            return
+        for chunk in stream:
+            pcm.extend(chunk)
+            chunks.put(chunk)
+        if pcm:
+            _cache_put(pcm_key, bytes(pcm))
+        else:
+            chunks.put(_FALLBACK)
+    except Exception as e:
+        print(f"[TTS stream failed] {e}")
+        if not pcm:
+            chunks.put(_FALLBACK)
+    finally:
+        chunks.put(None)
+
+
+def _play_sentences(sentences: "queue.Queue"):
+    """Playback worker: play each sentence's chunks in order, gaplessly."""
+    try:
+        writer = _PcmWriter()
+    except Exception as e:
+        print(f"[TTS PCM stream unavailable] {e}")
+        writer = None
+    while True:
+        item = sentences.get()
+        if item is None:
+            return
+        sentence, chunks = item
+        if writer is None:
+            # no device stream: let the synthesis job finish, then speak the
+            # sentence through speak()'s own fallbacks
+            while chunks.get() is not None:
+                pass
+            speak(sentence)
+            continue
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            if chunk is _FALLBACK:
+                speak(sentence)
+                continue
+            try:
+                writer.write(chunk)
+            except Exception as e:
+                print(f"[TTS PCM playback failed] {e}")
+
+
+def speak_stream(token_iter: Iterable[str]) -> str:
+    """Speak streamed text (e.g. `call_llm` output) as it is generated.
+
+    Tokens are buffered into sentences; each complete sentence is sent to
+    ElevenLabs right away while generation continues, and a single
+    playback thread plays the sentences back to back on the persistent
+    PCM stream. Falls back to `speak()` per sentence when streaming
+    playback is unavailable. Blocks until playback ends and returns the
+    spoken text.
+    """
+    spoken = []
+    if eleven_client is None or not VOICE_ID or _backends.sd is None:
+        for sentence in iter_sentences(token_iter):
+            spoken.append(sentence)
+            speak(sentence)
+        return " ".join(spoken)
+
+    sentences: "queue.Queue" = queue.Queue()
+    player = threading.Thread(target=_play_sentences, args=(sentences,), daemon=True)
+    player.start()
+    try:
+        for sentence in iter_sentences(token_iter):
+            spoken.append(sentence)
+            chunks: "queue.Queue" = queue.Queue()
+            _SYNTH_POOL.submit(_fetch_sentence, sentence, chunks)
+            sentences.put((sentence, chunks))
+    finally:
+        sentences.put(None)
+        player.join()
+    return " ".join(spoken)
+
+
+# speak_async micro-batcher: calls arriving within the window are
+# synthesized concurrently, multiplexed over the pooled HTTP connection.
+SPEAK_BATCH_WINDOW = 0.005
+SPEAK_BATCH_MAX = 8
+_speak_queue: Optional[asyncio.Queue] = None
+_speak_worker: Optional[asyncio.Task] = None
+
+
+def _synthesize_pcm(text: str) -> Optional[bytes]:
+    """Cached or freshly streamed PCM for `text`; None if streaming is unavailable."""
+    if eleven_client is None or not VOICE_ID:
+        return None
+    pcm_key = _cache_key(text, STREAM_MODEL_ID, STREAM_OUTPUT_FORMAT)
+    pcm = _cache_get(pcm_key)
+    if pcm is None:
+        chunks = _pcm_chunks(text)
+        if chunks is None:
+            return None
+        pcm = b"".join(chunks)
+        if pcm:
+            _cache_put(pcm_key, pcm)
+    return pcm or None
+
+
+async def speak_async(text: str) -> None:
+    """Async `speak()` for servers handling several sessions at once.
+
+    Requests that arrive within SPEAK_BATCH_WINDOW of each other are sent
+    together (up to SPEAK_BATCH_MAX) instead of one after another; the
+    audio is then played in arrival order.
+    """
+    global _speak_queue, _speak_worker
+    loop = asyncio.get_running_loop()
+    if _speak_worker is None or _speak_worker.done() or _speak_worker.get_loop() is not loop:
+        _speak_queue = asyncio.Queue()
+        _speak_worker = loop.create_task(_speak_batcher(_speak_queue))
+    fut = loop.create_future()
+    await _speak_queue.put((text, fut))
+    await fut
+
+
+async def _speak_batcher(q: asyncio.Queue) -> None:
+    while True:
+        batch = [await q.get()]
+        await asyncio.sleep(SPEAK_BATCH_WINDOW)
+        while len(batch) < SPEAK_BATCH_MAX and not q.empty():
+            batch.append(q.get_nowait())
+        # futures of cancelled callers are already done; skip them
+        batch = [(t, f) for t, f in batch if not f.done()]
+        if not batch:
+            continue
+        # the sync SDK runs in threads; its pooled client shares connections
+        results = await asyncio.gather(
+            *(asyncio.to_thread(_synthesize_pcm, t) for t, _ in batch),
+            return_exceptions=True,
+        )
+        for (text, fut), pcm in zip(batch, results):
+            if fut.done():
+                continue
+            try:
+                if isinstance(pcm, BaseException) or pcm is None or not await asyncio.to_thread(_play_pcm, pcm):
+                    await asyncio.to_thread(speak, text)
+                if not fut.done():
+                    fut.set_result(None)
+            except Exception as e:
+                if not fut.done():
+                    fut.set_exception(e)
 
+
+def _decode_text(val: str) -> bytes:
+    # base64 or plaintext
+    try:
+        return base64.b64decode(val)
+    except Exception:
+        return val.encode("utf-8", errors="replace")
+
+
+def _attr_bytes(attr: str):
+    def extract(obj):
+        val = getattr(obj, attr)
+        return bytes(val) if isinstance(val, (bytes, bytearray)) else _decode_text(val)
+    return extract
+
+
+def _coerce_bytes(obj):
+    # try __bytes__
+    b = bytes(obj)
+    return b or None
+
+
+def _pick_extractor(obj):
+    """Choose how to get bytes out of a response chunk of this type."""
+    if isinstance(obj, (bytes, bytearray)):
+        return bytes
+    if isinstance(obj, memoryview):
+        return memoryview.tobytes
+    if isinstance(obj, str):
+        return _decode_text
+    if hasattr(obj, "read"):
+        return lambda o: o.read()
+    if isinstance(getattr(obj, "content", None), (bytes, bytearray)):
+        return lambda o: bytes(o.content)
+    # common attribute names
+    for attr in ("audio", "data", "payload", "chunk", "bytes", "raw"):
+        if isinstance(getattr(obj, attr, None), (bytes, bytearray, str)):
+            return _attr_bytes(attr)
+    return _coerce_bytes
+
+
+# chunk type -> extractor, decided on the first chunk of that type so the
+# attribute probing is not repeated for every chunk of a stream
+_EXTRACTORS = {}
+
+
+def _extract_bytes(obj) -> Optional[bytes]:
+    if obj is None:
+        return None
+    fn = _EXTRACTORS.get(type(obj))
+    if fn is None:
+        fn = _EXTRACTORS[type(obj)] = _pick_extractor(obj)
+    try:
+        return fn(obj)
+    except Exception:
+        return None
+
+
+def _speak_local(text: str, shell_fallback: bool = True) -> bool:
+    """Speak `text` without ElevenLabs: pyttsx3, else Windows System.Speech.
+
+    Only reached when the ElevenLabs path is unavailable, so pyttsx3 and
+    subprocess are imported here rather than at module load.
+    """
+    pyttsx3 = _backends.pyttsx3
+    if pyttsx3 is not None:
+        try:
+            print("[TTS fallback] using local pyttsx3 fallback")
             engine = pyttsx3.init()
             engine.say(text)
             engine.runAndWait()
-            return
+            return True
+        except Exception as e:
+            print(f"[TTS fallback pyttsx3 failed] {e}")
+    if not shell_fallback:
+        return False
+    # Try Windows PowerShell System.Speech fallback (works without extra Python deps)
+    try:
+        import subprocess
+
+        cmd = [
+            "powershell",
+            "-NoProfile",
+            "-Command",
+            f"Add-Type -AssemblyName System.Speech; $s=New-Object System.Speech.Synthesis.SpeechSynthesizer; $s.Speak(\"{text.replace('"','\'') }\");",
+        ]
+        subprocess.run(cmd, check=False)
+        return True
+    except Exception as e:
+        print(f"[TTS fallback PowerShell failed] {e}")
+        return False
+
+
+def _content_length(resp) -> int:
+    """Declared body size of an SDK response, or 0 when it is not exposed."""
+    for obj in (resp, getattr(resp, "response", None)):
+        headers = getattr(obj, "headers", None)
+        if headers is None:
+            continue
+        try:
+            return max(int(headers.get("content-length", 0)), 0)
         except Exception:
-            pass
+            return 0
+    return 0
+
+
+class _ChunkBuffer:
+    """Accumulate response chunks, copying in place when the size is known.
+
+    With `expected` from Content-Length the buffer is allocated once and
+    chunks are copied into it through a memoryview; if more data than
+    declared arrives it degrades to ordinary bytearray growth.
+    """
+
+    def __init__(self, expected: int = 0):
+        self.buf = bytearray(expected)
+        self.view = memoryview(self.buf) if expected else None
+        self.off = 0
+
+    def write(self, chunk):
+        n = len(chunk)
+        if self.view is not None and self.off + n <= len(self.buf):
+            self.view[self.off : self.off + n] = chunk
+        else:
+            if self.view is not None:
+                # a bytearray cannot be resized while a view is exported
+                self.view.release()
+                self.view = None
+                del self.buf[self.off :]
+            self.buf += chunk
+        self.off += n
+
+    def tell(self) -> int:
+        return self.off
+
+    def getvalue(self) -> bytes:
+        if self.view is not None:
+            return self.view[: self.off].tobytes()
+        return bytes(self.buf)
+
+
+def speak(text: str, block: bool = True) -> threading.Event:
+    """Speak `text`; returns an Event set once its playback has finished.
+
+    With `block=False`, audio decoded from a convert() response keeps
+    playing in the background so the caller can prepare the next turn,
+    and a later utterance queues behind it. Wait on the returned Event
+    before e.g. reopening the mic. Streamed PCM is written to the device
+    as it arrives, so on that path speak() returns only once the audio
+    has been queued and the Event is already set. Use speak_stream() to
+    overlap synthesis of successive sentences.
+    """
+    _speak(text)
+    done = _playback_done
+    if block:
+        done.wait()
+    return done
+
+
+def _speak(text: str):
+    print("🔊 Speaking...")
+
+    if eleven_client is None or not VOICE_ID:
+        print("[TTS skipped] ElevenLabs client or VOICE_ID not configured")
+        # Fallback: attempt local TTS engine (pyttsx3) so speech still works offline
+        _speak_local(text, shell_fallback=False)
+        return
+
+    # Repeated utterances (greetings, errors, fillers) skip the API round-trip
+    pcm_key = _cache_key(text, STREAM_MODEL_ID, STREAM_OUTPUT_FORMAT)
+    pcm = _cache_get(pcm_key)
+    if pcm is not None and _play_pcm(pcm):
+        return
+    # Preferred path: stream PCM and play chunks as they arrive
+    if _speak_streaming(text, pcm_key):
+        return
+
+    cache_key = _cache_key(text, TTS_MODEL_ID, TTS_OUTPUT_FORMAT)
+    audio_bytes = _cache_get(cache_key)
+    if audio_bytes is not None:
+        _play_pcm16(audio_bytes, TTS_SAMPLE_RATE)
+        return
+    legacy = _cache_get(_cache_key(text, TTS_MODEL_ID, LEGACY_OUTPUT_FORMAT))
+    if legacy is not None:
+        _play_audio_bytes(legacy)
         return
 
     try:
         audio = eleven_client.text_to_speech.convert(
             voice_id=VOICE_ID,
-            model_id="eleven_multilingual_v2",
+            model_id=TTS_MODEL_ID,
             text=text,
-            output_format="mp3_44100_128",
+            output_format=TTS_OUTPUT_FORMAT,
         )
     except Exception as e:
         print(f"[TTS error] ElevenLabs convert failed: {e}")
         # fallback to local TTS
-        try:
-            import pyttsx3
-
-            engine = pyttsx3.init()
-            engine.say(text)
-            engine.runAndWait()
-            return
-        except Exception:
-            try:
-                import subprocess
-
-                cmd = [
-                    "powershell",
-                    "-NoProfile",
-                    "-Command",
-                    f"Add-Type -AssemblyName System.Speech; $s=New-Object System.Speech.Synthesis.SpeechSynthesizer; $s.Speak(\"{text.replace('"','\'') }\");",
-                ]
-                subprocess.run(cmd, check=False)
-                return
-            except Exception:
-                return
+        _speak_local(text)
+        return
 
     # Debug: show type of returned object for diagnostics
     try:
@@ -131,8 +797,6 @@ def speak(text: str):
                         if k in audio and isinstance(audio[k], str):
                             # base64? try to decode
                             try:
-                                import base64
-
                                 audio_bytes = base64.b64decode(audio[k])
                                 break
                             except Exception:
@@ -144,73 +808,24 @@ def speak(text: str):
             if audio_bytes is None:
                 try:
                     # Special-case generator/iterable that yields chunks
-                    import types
-
                     if isinstance(audio, types.GeneratorType) or hasattr(audio, "__iter__"):
-                        parts = bytearray()
-
-                        def _extract_bytes(obj):
-                            # Try many heuristics to get bytes from an object
-                            try:
-                                if obj is None:
-                                    return None
-                                if isinstance(obj, (bytes, bytearray)):
-                                    return bytes(obj)
-                                if isinstance(obj, memoryview):
-                                    return obj.tobytes()
-                                if isinstance(obj, str):
-                                    # base64 or plaintext
-                                    import base64
-
-                                    try:
-                                        return base64.b64decode(obj)
-                                    except Exception:
-                                        return obj.encode("utf-8", errors="replace")
-                                if hasattr(obj, "read"):
-                                    try:
-                                        return obj.read()
-                                    except Exception:
-                                        pass
-                                if hasattr(obj, "content") and isinstance(getattr(obj, "content"), (bytes, bytearray)):
-                                    return bytes(getattr(obj, "content"))
-                                # common attribute names
-                                for attr in ("audio", "data", "payload", "chunk", "bytes", "raw"):
-                                    if hasattr(obj, attr):
-                                        val = getattr(obj, attr)
-                                        if isinstance(val, (bytes, bytearray)):
-                                            return bytes(val)
-                                        if isinstance(val, str):
-                                            import base64
-
-                                            try:
-                                                return base64.b64decode(val)
-                                            except Exception:
-                                                return val.encode("utf-8", errors="replace")
-                                # try __bytes__
-                                try:
-                                    b = bytes(obj)
-                                    if b:
-                                        return b
-                                except Exception:
-                                    pass
-                            except Exception:
-                                return None
-                            return None
+                        parts = _ChunkBuffer(_content_length(audio))
 
                         # collect and inspect first several chunks for debugging
                         first_chunks = []
                         for i, chunk in enumerate(audio):
                             if i < 8:
                                 first_chunks.append((type(chunk), repr(chunk)[:200]))
-                            try:
-                                b = _extract_bytes(chunk)
-                                if b:
-                                    parts.extend(b)
-                            except Exception:
+                            # fast path: current SDKs yield raw bytes
+                            if isinstance(chunk, (bytes, bytearray)):
+                                parts.write(chunk)
                                 continue
+                            b = _extract_bytes(chunk)
+                            if b:
+                                parts.write(b)
                         # if we captured parts, use them; otherwise save chunk reprs for debug
-                        if parts:
-                            audio_bytes = bytes(parts)
+                        if parts.tell():
+                            audio_bytes = parts.getvalue()
                         else:
                             try:
                                 with open("eleven_chunks_debug.txt", "w", encoding="utf-8") as df:
@@ -241,88 +856,99 @@ def speak(text: str):
         except Exception as e:
             print(f"[TTS error] unable to obtain audio bytes and failed to save debug file: {e}")
         # Try local pyttsx3 fallback so assistant still speaks
-        try:
-            import pyttsx3
-
-            print("[TTS fallback] using local pyttsx3 fallback")
-            engine = pyttsx3.init()
-            engine.say(text)
-            engine.runAndWait()
-            return
-        except Exception as e:
-            print(f"[TTS fallback pyttsx3 failed] {e}")
-            # Try Windows PowerShell System.Speech fallback (works without extra Python deps)
-            try:
-                import subprocess, shlex
-
-                cmd = [
-                    "powershell",
-                    "-NoProfile",
-                    "-Command",
-                    f"Add-Type -AssemblyName System.Speech; $s=New-Object System.Speech.Synthesis.SpeechSynthesizer; $s.Speak(\"{text.replace('"','\'') }\");",
-                ]
-                subprocess.run(cmd, check=False)
-                return
-            except Exception as e2:
-                print(f"[TTS fallback PowerShell failed] {e2}")
+        _speak_local(text)
         return
 
-    # Try decoding MP3 using pydub (preferred), then soundfile, else save to disk
-    if AudioSegment is not None:
-            try:
-                seg = AudioSegment.from_file(io.BytesIO(audio_bytes), format="mp3")
+    _cache_put(cache_key, audio_bytes)
+    _play_pcm16(audio_bytes, TTS_SAMPLE_RATE)
 
-                # Optional downsampling / re-encoding to reduce file size for saved output
-                try:
-                    target_rate = int(os.getenv("TTS_TARGET_RATE", "22050"))
-                except Exception:
-                    target_rate = 22050
-                try:
-                    target_channels = int(os.getenv("TTS_TARGET_CHANNELS", "1"))
-                except Exception:
-                    target_channels = 1
-                target_bitrate = os.getenv("TTS_TARGET_BITRATE", "64k")
-
-                # Create a reduced-quality version for saving/export; use for playback to reduce CPU/IO
-                reduced_seg = seg.set_frame_rate(target_rate).set_channels(target_channels)
 
-                # Normalize based on sample width and convert to float32 numpy array for playback
-                samples = np.array(reduced_seg.get_array_of_samples())
-                if reduced_seg.channels > 1:
-                    samples = samples.reshape((-1, reduced_seg.channels))
-                max_val = float(1 << (8 * reduced_seg.sample_width - 1))
-                audio_np = samples.astype(np.float32) / max_val
+def _play_pcm16(pcm: bytes, samplerate: int):
+    """Play little-endian 16-bit mono PCM: a numpy view, scaled, no decode."""
+    samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+    _start_playback(samples * np.float32(1.0 / 32768.0), samplerate)
 
-                if sd is None:
-                    print("[Audio playback skipped] sounddevice not available")
-                else:
-                    sd.play(audio_np, samplerate=reduced_seg.frame_rate)
-                    sd.wait()
 
-                # Export reduced MP3 bytes for smaller on-disk files (if needed)
-                try:
-                    out_buf = io.BytesIO()
-                    reduced_seg.export(out_buf, format="mp3", bitrate=target_bitrate)
-                    out_buf.seek(0)
-                    reduced_bytes = out_buf.read()
-                    # overwrite audio_bytes with reduced mp3 for downstream saving
-                    audio_bytes = reduced_bytes
-                except Exception:
-                    # If export fails, keep original audio_bytes
-                    pass
+def _target_format():
+    """Playback (sample_rate, channels) from TTS_TARGET_RATE / TTS_TARGET_CHANNELS."""
+    try:
+        target_rate = int(os.getenv("TTS_TARGET_RATE", "22050"))
+    except Exception:
+        target_rate = 22050
+    try:
+        target_channels = int(os.getenv("TTS_TARGET_CHANNELS", "1"))
+    except Exception:
+        target_channels = 1
+    return target_rate, target_channels
+
+
+def _to_target(seg, target_rate: int, target_channels: int):
+    """Float32 samples of a pydub segment at the playback format.
+
+    Downmix and resampling run in numpy/scipy on the decoded samples
+    rather than through pydub's set_frame_rate/set_channels. Returns
+    (samples, sample_rate).
+    """
+    # View the raw PCM directly instead of copying array.array
+    # element-wise, then normalize in a single vectorized step
+    dtype = {1: np.int8, 2: np.int16, 4: np.int32}[seg.sample_width]
+    samples = np.frombuffer(seg.raw_data, dtype=dtype)
+    audio_np = samples * np.float32(1.0 / (1 << (8 * seg.sample_width - 1)))
+    if seg.channels > 1:
+        audio_np = audio_np.reshape((-1, seg.channels))
+        if target_channels == 1:
+            audio_np = audio_np.mean(axis=1, dtype=np.float32)
+
+    rate = seg.frame_rate
+    resample_poly = _backends.resample_poly
+    if rate != target_rate and resample_poly is not None:
+        # polyphase filter, e.g. 44100 -> 22050 is up=1, down=2
+        g = math.gcd(target_rate, rate)
+        audio_np = resample_poly(audio_np, target_rate // g, rate // g, axis=0).astype(np.float32)
+        rate = target_rate
+    return audio_np, rate
+
+
+def _play_audio_bytes(audio_bytes: bytes):
+    # MP3 (legacy cache entries): try decoding with miniaudio (fastest),
+    # then pydub, then soundfile, else save to disk
+    target_rate, target_channels = _target_format()
+
+    miniaudio = _backends.miniaudio
+    if miniaudio is not None:
+        try:
+            # decodes and resamples in C straight to int16 at the target format
+            decoded = miniaudio.decode(
+                audio_bytes,
+                output_format=miniaudio.SampleFormat.SIGNED16,
+                nchannels=target_channels,
+                sample_rate=target_rate,
+            )
+            # zero-copy view of the decoder's buffer, scaled in one pass
+            samples = np.frombuffer(decoded.samples, dtype=np.int16)
+            audio_np = samples * np.float32(1.0 / 32768.0)
+            if decoded.nchannels > 1:
+                audio_np = audio_np.reshape((-1, decoded.nchannels))
+            _start_playback(audio_np, decoded.sample_rate)
+            return
+        except Exception as e:
+            print(f"[TTS decode with miniaudio failed] {e}")
 
+    AudioSegment = _backends.AudioSegment
+    if AudioSegment is not None:
+            try:
+                seg = AudioSegment.from_file(io.BytesIO(audio_bytes), format="mp3")
+                audio_np, rate = _to_target(seg, target_rate, target_channels)
+                _start_playback(audio_np, rate)
                 return
             except Exception as e:
                 print(f"[TTS decode with pydub failed] {e}")
 
+    sf = _backends.sf
     if sf is not None:
         try:
             audio_data, samplerate = sf.read(io.BytesIO(audio_bytes), dtype="float32")
-            if sd is None:
-                print("[Audio playback skipped] sounddevice not available")
-                return
-            sd.play(audio_data, samplerate)
-            sd.wait()
+            _start_playback(audio_data, samplerate)
             return
         except Exception as e:
             print(f"[TTS decode with soundfile failed] {e}")
@@ -335,3 +961,22 @@ def speak(text: str):
         print(f"[Audio saved] {out_path} (install 'pydub' + ffmpeg or 'soundfile' to play automatically)")
     except Exception as e:
         print(f"[TTS save failed] {e}")
+
+
+def _warmup():
+    """Pay first-utterance cold-start costs ahead of time.
+
+    Opens the pooled ElevenLabs connection (TLS + HTTP/2 settings) with a
+    cheap authenticated request and imports the audio backend. MP3 is
+    only decoded for legacy cache entries, so no decoder is warmed.
+    """
+    if eleven_client is not None and _http is not None:
+        try:
+            _http.head(f"{ELEVENLABS_BASE_URL}/v1/voices", headers={"xi-api-key": ELEVENLABS_API_KEY})
+        except Exception:
+            pass
+    _backends.sd  # import now rather than on first playback
+
+
+# opt-in so scripts and test runs don't pay for it: TTS_WARMUP=1
+start_warmup(_warmup, "TTS_WARMUP")
@@ -0,0 +1,51 @@
+"""Export the reranker and embedder to ONNX with dynamic int8 quantization.
+
+Usage (from the `voice-rag-agent` directory):
+    python tools/export_onnx.py
+
+Requires `optimum[onnxruntime]` and `transformers`. Writes
+`rag/onnx_ce/model_int8.onnx` and `rag/onnx_embed/model_int8.onnx` (plus
+tokenizer files), which `rag/reranker.py` and `rag/retriever.py` pick up
+automatically on the next start.
+"""
+from pathlib import Path
+
+RAG_DIR = Path(__file__).resolve().parents[1] / "rag"
+
+MODELS = [
+    ("cross-encoder/ms-marco-MiniLM-L-6-v2", RAG_DIR / "onnx_ce", "sequence-classification"),
+    ("sentence-transformers/all-MiniLM-L6-v2", RAG_DIR / "onnx_embed", "feature-extraction"),
+]
+
+
+def export(model_id: str, out_dir: Path, task: str):
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTModelForSequenceClassification
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoTokenizer
+
+    cls = ORTModelForSequenceClassification if task == "sequence-classification" else ORTModelForFeatureExtraction
+    print(f"Exporting {model_id} -> {out_dir}")
+    model = cls.from_pretrained(model_id, export=True)
+    model.save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(model_id).save_pretrained(out_dir)
+
+    src = out_dir / "model.onnx"
+    dst = out_dir / "model_int8.onnx"
+    quantize_dynamic(str(src), str(dst), weight_type=QuantType.QInt8)
+    print(f"Saved {dst} ({dst.stat().st_size / 1024 / 1024:.1f} MB, fp32 was {src.stat().st_size / 1024 / 1024:.1f} MB)")
+
+
+def main():
+    try:
+        import optimum.onnxruntime  # noqa: F401
+        import onnxruntime.quantization  # noqa: F401
+    except Exception as e:
+        print("Missing dependencies for ONNX export:", e)
+        print("Install optimum[onnxruntime] and transformers to run the export")
+        return
+    for model_id, out_dir, task in MODELS:
+        export(model_id, out_dir, task)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Sweep IVF `nprobe` and report recall/latency against brute force.
+
+Usage (from the `voice-rag-agent` directory, after `python rag/ingest.py`
+with `VRAG_INDEX=ivfpq`):
+    python tools/tune_nprobe.py [num_queries] [k]
+
+Stored chunk embeddings are used as the calibration queries; exact
+inner-product search over `rag/embeddings.npy` is the ground truth. Pick
+the smallest nprobe with acceptable recall and export it as
+`VRAG_NPROBE` for the retriever.
+"""
+import sys
+import time
+from pathlib import Path
+
+RAG_DIR = Path(__file__).resolve().parents[1] / "rag"
+NPROBES = (1, 2, 4, 8, 16, 32)
+
+
+def main():
+    try:
+        import numpy as np
+        import faiss
+    except Exception as e:
+        print("Missing dependencies for nprobe tuning:", e)
+        return
+
+    num_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    index = faiss.read_index(str(RAG_DIR / "faiss.index"))
+    # also finds IVF indexes wrapped in e.g. a PreTransform
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is None:
+        print("Index has no nprobe parameter (not IVF); nothing to tune")
+        return
+    emb = np.load(str(RAG_DIR / "embeddings.npy")).astype(np.float32)
+
+    rng = np.random.default_rng(0)
+    qids = rng.choice(len(emb), size=min(num_queries, len(emb)), replace=False)
+    queries = emb[qids]
+
+    # ground truth: exact top-k by inner product
+    truth = np.argsort(-(queries @ emb.T), axis=1)[:, :k]
+
+    ps = faiss.ParameterSpace()
+    print(f"{len(queries)} queries, k={k}, nlist={ivf.nlist}")
+    print("nprobe\trecall@k\tms/query")
+    for nprobe in NPROBES:
+        ps.set_index_parameter(index, "nprobe", nprobe)
+        t0 = time.perf_counter()
+        for q in queries:
+            index.search(q[None, :], k)
+        ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        _, I = index.search(queries, k)
+        recall = np.mean([len(set(I[i]) & set(truth[i])) / k for i in range(len(queries))])
+        print(f"{nprobe}\t{recall:.3f}\t\t{ms:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Pooled HTTP clients and connection warmup shared by the API wrappers.
+
+`speech/tts.py` (ElevenLabs) and `utils/llm.py` (Groq) each keep one
+keep-alive client so TLS is negotiated once, not per request. Warmup
+requests are opt-in through an environment flag so scripts and test
+runs make no network calls at import.
+"""
+import os
+import threading
+
+try:
+    import httpx
+except Exception:
+    httpx = None
+
+
+def make_http_client(max_keepalive: int = 4, timeout: float = 30):
+    """Keep-alive httpx client, HTTP/2 when `h2` is installed; None without httpx."""
+    if httpx is None:
+        return None
+    limits = httpx.Limits(max_keepalive_connections=max_keepalive, keepalive_expiry=300)
+    timeout = httpx.Timeout(timeout, connect=5)
+    try:
+        return httpx.Client(http2=True, limits=limits, timeout=timeout)
+    except Exception:
+        try:
+            return httpx.Client(limits=limits, timeout=timeout)
+        except Exception:
+            return None
+
+
+def start_warmup(fn, env_flag: str) -> bool:
+    """Run `fn` on a daemon thread if `env_flag` is set to 1; errors are ignored."""
+    if os.getenv(env_flag) != "1":
+        return False
+
+    def run():
+        try:
+            fn()
+        except Exception:
+            pass
+
+    threading.Thread(target=run, daemon=True).start()
+    return True
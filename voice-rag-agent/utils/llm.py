@@ -1,30 +1,93 @@
+import itertools
+import os
+import re
+
+from dotenv import load_dotenv
 from groq import Groq
 
-client = Groq(api_key="YOUR_GROQ_API_KEY")
+from postprocess import iter_sentences
+from utils.http import make_http_client, start_warmup
 
-def call_llm(query, context):
-    prompt = f"""
-You are a technical support voice assistant.
-Use the manual context.
 
-Context:
-{context}
+load_dotenv()
 
-User Question:
-{query}
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+client = None
+if GROQ_API_KEY:
+    # pooled keep-alive client so each call_llm reuses the TLS connection
+    client = Groq(api_key=GROQ_API_KEY, http_client=make_http_client(max_keepalive=8, timeout=60))
 
-Answer in short spoken style sentences.
-"""
 
-    completion = client.chat.completions.create(
-        model="openai/gpt-oss-120b",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7,
-        max_completion_tokens=1024,
-        stream=True
-    )
+# opt-in, like TTS_WARMUP: a cheap GET so TLS (and HTTP/2 settings) are
+# done before the first question; LLM_WARMUP=1
+if client is not None:
+    start_warmup(client.models.list, "LLM_WARMUP")
+
+# small, fast model by default: spoken answers are short and time to
+# first token dominates; override with GROQ_MODEL
+MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+MAX_COMPLETION_TOKENS = 256
 
+SYSTEM = (
+    "You are a technical support voice assistant. Use the manual context. "
+    "Answer in short spoken style sentences."
+)
+
+# a sentence end that iter_sentences would already split on
+_BOUNDARY = re.compile(r"[.!?]\s|\n")
+
+
+def _deltas(completion):
     for chunk in completion:
         content = chunk.choices[0].delta.content
         if content:
             yield content
+
+
+def _sentences(deltas, early_partial):
+    if early_partial:
+        buf = ""
+        for content in deltas:
+            buf += content
+            if buf.rstrip().endswith((".", "!", "?")):
+                # release now instead of waiting for the next delta to
+                # bring the whitespace that confirms the boundary
+                yield from iter_sentences([buf])
+                break
+            if _BOUNDARY.search(buf):
+                # first sentence already ended the usual way
+                deltas = itertools.chain([buf], deltas)
+                break
+        else:
+            deltas = [buf]
+    yield from iter_sentences(deltas)
+
+
+def call_llm(query, context, early_partial=False):
+    """Stream the answer to `query` as whole sentences.
+
+    With `early_partial`, the first sentence is released the moment its
+    closing punctuation arrives, at the risk of splitting on something
+    like "3." before "5" follows.
+    """
+    if client is None:
+        yield "[LLM unavailable - set GROQ_API_KEY]"
+        return
+
+    # static instructions first, then the retrieved context, so identical
+    # leading messages can be reused by the server's prompt cache
+    messages = [
+        {"role": "system", "content": SYSTEM},
+        {"role": "system", "content": f"Context:\n{context}"},
+        {"role": "user", "content": query},
+    ]
+
+    completion = client.chat.completions.create(
+        model=MODEL,
+        messages=messages,
+        temperature=0.7,
+        max_completion_tokens=MAX_COMPLETION_TOKENS,
+        stream=True
+    )
+
+    yield from _sentences(_deltas(completion), early_partial)